@@ -1,98 +1,47 @@
-from fastapi import APIRouter, HTTPException, Query, Response
-from fastapi.responses import JSONResponse
-import xarray as xr
-import numpy as np
-import matplotlib
-# Use Agg backend immediately to prevent server GUI errors
-matplotlib.use('Agg') 
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
-from matplotlib.collections import PatchCollection
-from geojson import Feature, FeatureCollection, MultiPolygon
-from scipy.ndimage import gaussian_filter
-import os
-import io
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+import gzip
+import hashlib
 
 # --- PROJECT IMPORTS ---
-from app.services import gpm_service 
+from app.services import events, gpm_service, gpm_overview, gpm_render, job_service
 
 router = APIRouter()
 
-# Thresholds for rain intensity (mm/hr)
-LEVELS = [0.1, 0.5, 5.0, 10.0, 20.0]
+# Constraints of GET / (also applied to "gpm" job submissions)
+DRAW_MODES = ["vector", "plot"]
+MAX_ZOOM = 24
 
 # ==========================================
-# 1. HELPER: CENTRALIZED DATA PROCESSING
+# 1. BACKGROUND JOBS
 # ==========================================
-def _load_and_process_gpm(filename: str, bounds: dict):
-    """
-    Handles loading, slicing, transposing, flipping, and smoothing.
-    Returns: (dataset_handle, lats, lons, raw_data, smooth_data)
-    """
-    file_path = f"app/data/{filename}"
-    if not os.path.exists(file_path):
-        raise FileNotFoundError("File not found")
-
-    # A. Open Dataset
+def _file_version(params):
     try:
-        ds = xr.open_dataset(file_path, engine='h5netcdf', group='Grid', decode_times=False)
-    except OSError:
-        ds = xr.open_dataset(file_path, engine='h5netcdf', decode_times=False)
-
-    # B. Identify Variable
-    if 'precipitation' in ds:
-         data = ds['precipitation'][0]
-    elif 'precipitationCal' in ds:
-         data = ds['precipitationCal'][0]
-    else:
-         ds.close()
-         raise ValueError("No precipitation variable found")
-
-    # C. Slice Data
-    lat_name = next((k for k in ds.coords if 'lat' in k.lower()), 'lat')
-    lon_name = next((k for k in ds.coords if 'lon' in k.lower()), 'lon')
-
-    subset = data.sel({
-        lat_name: slice(bounds['bottom'], bounds['top']),
-        lon_name: slice(bounds['left'], bounds['right'])
-    })
-    
-    # Fallback for inverted latitude order (North->South)
-    if subset.size == 0:
-        subset = data.sel({
-            lat_name: slice(bounds['top'], bounds['bottom']),
-            lon_name: slice(bounds['left'], bounds['right'])
-        })
-
-    # D. Prepare Numpy Arrays
-    precip_vals = np.nan_to_num(subset.values)
-    lats = subset.coords[lat_name].values
-    lons = subset.coords[lon_name].values
-
-    # E. Fix Shape (Transpose if (Lon, Lat) -> (Lat, Lon))
-    # Target shape: (Rows=Lat, Cols=Lon)
-    if precip_vals.shape == (len(lons), len(lats)):
-        precip_vals = precip_vals.T
-    elif precip_vals.shape != (len(lats), len(lons)):
-         # Handle singleton dims like (1, lat, lon)
-         precip_vals = np.squeeze(precip_vals)
-         if precip_vals.shape == (len(lons), len(lats)): 
-             precip_vals = precip_vals.T
-
-    # F. Force Monotonicity (Fix Inverted Axes for Matplotlib)
-    if lats[0] > lats[-1]:
-        lats = np.flip(lats)
-        precip_vals = np.flipud(precip_vals)
-    
-    if lons[0] > lons[-1]:
-        lons = np.flip(lons)
-        precip_vals = np.fliplr(precip_vals)
-
-    # G. Generate Smoothed Data (For Vectorizing)
-    # sigma=1 connects scattered pixels into blobs suitable for contouring
-    precip_smooth = gaussian_filter(precip_vals, sigma=1.0)
-
-    return ds, lats, lons, precip_vals, precip_smooth
+        return gpm_render.file_mtime(params["filename"])
+    except FileNotFoundError:
+        return None
+
+def _check_gpm(params):
+    """Same constraints as the GET / query parameters (ValueError -> 422)."""
+    if _file_version(params) is None:
+        raise ValueError("File not found")
+    if params["draw"] not in DRAW_MODES:
+        raise ValueError(f"'draw' must be one of {DRAW_MODES}")
+    if params["agg"] not in gpm_overview.METHODS:
+        raise ValueError(f"'agg' must be one of {list(gpm_overview.METHODS)}")
+    for name in ("width", "height"):
+        if params[name] is not None and params[name] < 1:
+            raise ValueError(f"'{name}' must be >= 1")
+    if params["zoom"] is not None and not 0 <= params["zoom"] <= MAX_ZOOM:
+        raise ValueError(f"'zoom' must be between 0 and {MAX_ZOOM}")
+
+@job_service.register("gpm", version=_file_version, check=_check_gpm)
+def gpm_job(filename: str, toplat: float, bottomlat: float, leftlon: float, rightlon: float,
+            draw: str = "vector", width: int = None, height: int = None, zoom: float = None,
+            agg: str = "max", progress=None):
+    """Background version of GET /api/gpm/ (same parameters)."""
+    bounds = {'top': toplat, 'bottom': bottomlat, 'left': leftlon, 'right': rightlon}
+    return gpm_render.render_gpm(filename, bounds, draw, width, height, zoom, agg, progress)
 
 # ==========================================
 # 2. MAIN ENDPOINT
@@ -104,105 +53,38 @@ async def get_gpm_data(
     bottomlat: float = Query(...),
     leftlon: float = Query(...),
     rightlon: float = Query(...),
-    draw: str = Query("vector", enum=["vector", "plot"], description="Output mode")
+    draw: str = Query("vector", enum=DRAW_MODES, description="Output mode"),
+    width: int = Query(None, ge=1, description="Target output width in pixels"),
+    height: int = Query(None, ge=1, description="Target output height in pixels"),
+    zoom: float = Query(None, ge=0, le=MAX_ZOOM, description="Web-mercator zoom (alternative to width/height)"),
+    agg: str = Query("max", enum=list(gpm_overview.METHODS), description="Downsampling aggregation"),
 ):
     """
     Unified Endpoint for GPM Data.
     - draw='vector': Returns 3D GeoJSON Polygons (smoothed)
     - draw='plot': Returns a transparent PNG overlay (scatter + vectors)
+    The grid is reduced to roughly one cell per output pixel before smoothing,
+    so cost follows the screen size rather than the size of the bounds.
+    For large requests, submit the same parameters to POST /api/jobs instead.
     """
     bounds = {'top': toplat, 'bottom': bottomlat, 'left': leftlon, 'right': rightlon}
+    width, height = gpm_render.resolve_lod(bounds, draw, width, height, zoom)
+
     try:
-        # 1. Process Data
-        ds, lats, lons, raw_data, smooth_data = _load_and_process_gpm(filename, bounds)
+        # Process + Render (cached per file version and parameters)
+        content, media_type = gpm_render.render_cached(filename, bounds, draw, width, height, agg)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="File not found")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-
-    try:
-        # ==========================
-        # MODE A: VECTOR (GeoJSON)
-        # ==========================
-        if draw == "vector":
-            features = []
-            
-            # Use matplotlib to calculate contours purely mathematically (no visible plot)
-            fig, ax = plt.subplots()
-            
-            for level in LEVELS:
-                if np.max(smooth_data) < level: continue
-
-                # Use contour (Lines) + allsegs for robust extraction
-                cs = ax.contour(lons, lats, smooth_data, levels=[level])
-                
-                if len(cs.allsegs) > 0:
-                    for vertices in cs.allsegs[0]:
-                        if len(vertices) < 3: continue
-                        
-                        poly_coords = vertices.tolist()
-                        
-                        # --- FIX START ---
-                        # Check if the polygon is closed. If not, snap the last point to the first.
-                        # This eliminates the "Giant Wall" artifact at the edges of the map.
-                        if poly_coords[0] != poly_coords[-1]:
-                            poly_coords.append(poly_coords[0])
-                        # --- FIX END ---
-                        
-                        polygon_structure = [poly_coords] 
-                        
-                        features.append(Feature(
-                            geometry=MultiPolygon([polygon_structure]),
-                            properties={"level": level}
-                        ))
-            
-            plt.close(fig)
-            ds.close()
-            return JSONResponse(content=FeatureCollection(features))
-
-        # ==========================
-        # MODE B: PLOT (Image)
-        # ==========================
-        elif draw == "plot":
-            fig, ax = plt.subplots(figsize=(10, 8), dpi=100)
-            
-            # 1. Raw Data Scatter (Blue Dots)
-            xx, yy = np.meshgrid(lons, lats)
-            mask = raw_data > 0.1
-            ax.scatter(
-                xx[mask], yy[mask], 
-                s=raw_data[mask] * 10, # Size relative to intensity
-                c='cyan', alpha=0.6, label="Raw Data"
-            )
-
-            # 2. Vector Overlay (Red Lines)
-            # Use the exact same smoothing logic as Vector mode to ensure visual match
-            debug_polys = []
-            for level in LEVELS:
-                if np.max(smooth_data) < level: continue
-                
-                cs = ax.contour(lons, lats, smooth_data, levels=[level], colors=['red'], linewidths=1.5, alpha=0.8)
-                # Keep lines visible on the plot
-
-            # 3. Formatting
-            ax.set_xlim(leftlon, rightlon)
-            ax.set_ylim(bottomlat, toplat)
-            ax.axis('off') # Transparent background, no axis
-            
-            # Save to Buffer
-            buf = io.BytesIO()
-            plt.savefig(buf, format='png', transparent=True, bbox_inches='tight', pad_inches=0)
-            buf.seek(0)
-            plt.close(fig)
-            ds.close()
-            
-            return Response(content=buf.getvalue(), media_type="image/png")
-
-    except Exception as e:
-        ds.close()
+    except gpm_render.BoundsError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except gpm_render.RenderError as e:
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Processing Error: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    return Response(content=content, media_type=media_type)
 
 
 # ==========================================
@@ -211,4 +93,66 @@ async def get_gpm_data(
 @router.get("/files")
 async def list_files():
     """List available HDF5 files."""
-    return gpm_service.list_available_files()
\ No newline at end of file
+    return gpm_service.list_available_files()
+
+@router.get("/grid")
+def get_gpm_grid(
+    request: Request,
+    filename: str = Query(...),
+    toplat: float = Query(90),
+    bottomlat: float = Query(-90),
+    leftlon: float = Query(-180),
+    rightlon: float = Query(180),
+    width: int = Query(None, ge=1, description="Max grid width (e.g. GPU max texture size)"),
+    height: int = Query(None, ge=1, description="Max grid height"),
+    agg: str = Query("max", enum=list(gpm_overview.METHODS), description="Downsampling aggregation"),
+):
+    """
+    Packed uint16 grid for client-side (WebGL) rendering, see
+    gpm_service.get_binary_grid for the layout. Defaults to the whole file so
+    the browser fetches it once and pans/zooms/recolors locally.
+    Gzipped, cached per file version and revalidated with an ETag.
+    A plain def: FastAPI runs it in the threadpool, so building the grid on
+    a cache miss does not block the event loop (scratch buffers are per thread).
+    """
+    try:
+        mtime = gpm_render.file_mtime(filename)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    key = (filename, mtime, toplat, bottomlat, leftlon, rightlon, width, height, agg)
+    # The gzip and identity bodies differ, so each gets its own (strong) ETag
+    gzipped = "gzip" in request.headers.get("accept-encoding", "")
+    digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+    etag = f'"{digest}-gzip"' if gzipped else f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    try:
+        body = gpm_render.cached_grid(*key)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/octet-stream", headers=headers)
+
+@router.get("/catalog")
+async def get_catalog():
+    """Metadata of ingested files (newest first)."""
+    return sorted(gpm_service.CATALOG.values(), key=lambda e: e["mtime"], reverse=True)
+
+@router.get("/events")
+async def stream_events():
+    """
+    Server-Sent Events: 'file' (detected/ready/removed) and 'ingest' (stage progress).
+    """
+    queue = events.subscribe()
+    return StreamingResponse(
+        events.stream(queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
\ No newline at end of file
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from app.services import job_service
+
+router = APIRouter()
+
+
+class JobRequest(BaseModel):
+    kind: str                # "gpm" or "noaa"
+    params: dict = {}        # Same query parameters as the matching GET endpoint
+
+
+def _with_links(job):
+    job["result_url"] = f"/api/jobs/{job['id']}/result" if job["status"] == "done" else None
+    return job
+
+
+@router.post("", status_code=202)
+async def create_job(req: JobRequest):
+    """
+    Queues a long-running render/download and returns immediately.
+    Identical submissions return the same job. Poll GET /api/jobs/{id}.
+    """
+    try:
+        return _with_links(job_service.submit(req.kind, req.params))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown job kind '{req.kind}'")
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except job_service.QueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Status and progress (0..1) of a job."""
+    job = job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return _with_links(job)
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Serves the stored result of a finished job."""
+    try:
+        path, media_type = job_service.get_result(job_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return FileResponse(path, media_type=media_type)
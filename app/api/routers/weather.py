@@ -1,9 +1,42 @@
+import asyncio
+import threading
 from fastapi import APIRouter, Query, Response, HTTPException
-from app.services import noaa_service
+from starlette.concurrency import run_in_threadpool
+from app.services import noaa_service, job_service
 from app.utils import plotting, formatting
 
 router = APIRouter()
 
+# pyplot keeps global state; renders from the endpoint and job threads take turns
+_PLOT_LOCK = threading.Lock()
+
+def _render_noaa(date, hour, mode, bounds, lats, lons, data):
+    """Returns (content_bytes, media_type)."""
+    if mode == "image":
+        # Utils: Plot Data
+        date_clean = formatting.format_pretty_date(date, hour)
+        with _PLOT_LOCK:
+            img_bytes = plotting.generate_heatmap(
+                lats, lons, data, bounds,
+                "NOAA GFS (0.25°)", date_clean
+            )
+        return img_bytes, "image/png"
+    else:
+        return b"Binary mode skipped", "text/plain"
+
+@job_service.register("noaa")
+def noaa_job(date: str, toplat: float, bottomlat: float, leftlon: float, rightlon: float,
+             hour: str = "00", mode: str = "image", progress=None):
+    """Background version of GET /api/weather/filter_fnl (same parameters)."""
+    bounds = {'top': toplat, 'bottom': bottomlat, 'left': leftlon, 'right': rightlon}
+    progress = progress or (lambda fraction, stage: None)
+
+    progress(0.1, "downloading")
+    lats, lons, data = asyncio.run(noaa_service.fetch_and_process_gfs(date, hour, bounds))
+
+    progress(0.8, "rendering")
+    return _render_noaa(date, hour, mode, bounds, lats, lons, data)
+
 @router.get("/filter_fnl")
 async def get_noaa_data(
     date: str = Query(...),
@@ -20,16 +53,9 @@ async def get_noaa_data(
         # Service: Get Data
         lats, lons, data = await noaa_service.fetch_and_process_gfs(date, hour, bounds)
         
-        if mode == "image":
-            # Utils: Plot Data
-            date_clean = formatting.format_pretty_date(date, hour)
-            img_bytes = plotting.generate_heatmap(
-                lats, lons, data, bounds, 
-                "NOAA GFS (0.25°)", date_clean
-            )
-            return Response(content=img_bytes, media_type="image/png")
-        else:
-            return Response(content=b"Binary mode skipped", media_type="text/plain")
+        # Rendering is blocking (and may wait on _PLOT_LOCK): keep it off the event loop
+        content, media_type = await run_in_threadpool(_render_noaa, date, hour, mode, bounds, lats, lons, data)
+        return Response(content=content, media_type=media_type)
 
     except Exception as e:
         return Response(status_code=500, content=str(e), media_type="text/plain")
\ No newline at end of file
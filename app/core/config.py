@@ -5,7 +5,33 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 
 TEMP_DIR = os.path.join(BASE_DIR, "temp")
 DATA_DIR = os.path.join(BASE_DIR, "app", "data")
+STATIC_DIR = os.path.join(BASE_DIR, "app", "static")
+JOBS_DIR = os.path.join(TEMP_DIR, "jobs")
+
+# Background jobs (/api/jobs)
+JOB_WORKERS = 2           # Max jobs running at once
+JOB_TTL = 60 * 60         # Seconds a finished job and its result are kept
+JOB_QUEUE_SIZE = 32       # Max client jobs queued or running; further POSTs get 503
+
+# Per-thread scratch buffers (see app/utils/arrays.scratch)
+SCRATCH_MAX_BYTES = 8 * 2**20  # Larger arrays are allocated per call, not pooled
+
+# GPM file watcher / pre-computation (see gpm_watcher)
+WATCH_POLL_INTERVAL = 10  # Seconds between scans when inotify (watchdog) is unavailable
+WATCH_SETTLE = 2          # Seconds a file must stay unchanged before it is ingested
+WATCH_WARM_ON_START = 4   # Newest files already in DATA_DIR that are ingested at startup
+
+# Regions pre-computed for every new file: GeoJSON vectors and the draw='plot'
+# overlay at its default size (the request the dashboard's GPM plot makes)
+PRECOMPUTE_REGIONS = [
+    {'top': -5, 'bottom': -10, 'left': 105, 'right': 115},  # Java (initial dashboard bounds)
+]
+
+# Whole-file grid the WebGL dashboard requests (width = height, capped by the
+# GPU's max texture size; WebGL2 guarantees 2048). Pre-computed for every new file.
+GRID_TEXTURE_SIZE = 4096
 
 # Ensure dirs exist
 os.makedirs(TEMP_DIR, exist_ok=True)
-os.makedirs(DATA_DIR, exist_ok=True)
\ No newline at end of file
+os.makedirs(DATA_DIR, exist_ok=True)
+os.makedirs(JOBS_DIR, exist_ok=True)
\ No newline at end of file
@@ -1,8 +1,41 @@
+import signal
+import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.routers import dashboard, weather, gpm
+from fastapi.staticfiles import StaticFiles
+from app.core.config import STATIC_DIR
+from app.api.routers import dashboard, weather, gpm, jobs
+from app.services import events
+from app.services.gpm_watcher import watcher
 
-app = FastAPI(title="Unified Weather Processor")
+def _close_events_on_exit():
+    """
+    uvicorn waits for open responses before running the lifespan shutdown, so
+    SSE streams (/api/gpm/events) are also closed as soon as the exit signal
+    arrives; the server's own handler then runs as usual.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        handler = signal.getsignal(sig)
+        if not callable(handler):
+            continue
+        def on_exit(signum, frame, handler=handler):
+            events.close()
+            handler(signum, frame)
+        signal.signal(sig, on_exit)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Watch DATA_DIR and pre-compute products for new granules
+    _close_events_on_exit()
+    watcher.start()
+    yield
+    events.close()
+    watcher.stop()
+
+app = FastAPI(title="Unified Weather Processor", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -16,6 +49,10 @@ app.add_middleware(
 app.include_router(dashboard.router)
 app.include_router(weather.router, prefix="/api/weather", tags=["NOAA"])
 app.include_router(gpm.router, prefix="/api/gpm", tags=["GPM"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+
+# Dashboard assets (ETag / 304 handled by StaticFiles)
+app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import threading
+
+# Tiny in-process pub/sub for Server-Sent Events. publish() may be called from
+# any thread (watcher, job workers); each subscriber is an asyncio.Queue that
+# lives on the event loop serving its connection.
+
+_subscribers = set()
+_lock = threading.Lock()
+
+# loop -> asyncio.Event set by close(); every stream() on that loop returns
+_closing = {}
+_closed = threading.Event()
+
+# A slow client never blocks publishers; when its queue is full it loses events
+QUEUE_SIZE = 100
+
+
+def subscribe():
+    """Registers a subscriber on the running loop. Returns its queue."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    with _lock:
+        if loop not in _closing:
+            _closing[loop] = asyncio.Event()
+            if _closed.is_set():
+                _closing[loop].set()
+        _subscribers.add((loop, queue))
+    return queue
+
+
+def unsubscribe(queue):
+    with _lock:
+        for sub in [s for s in _subscribers if s[1] is queue]:
+            _subscribers.discard(sub)
+            if not any(loop is sub[0] for loop, _ in _subscribers):
+                _closing.pop(sub[0], None)
+
+
+def close():
+    """
+    Ends every open stream (server shutdown). Takes no lock, so it is safe
+    to call from a signal handler as well as from any thread.
+    """
+    _closed.set()
+    for loop, event in list(_closing.items()):
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass
+
+
+def _offer(queue, message):
+    try:
+        queue.put_nowait(message)
+    except asyncio.QueueFull:
+        pass
+
+
+def publish(event, data):
+    """Sends one SSE message (event name + JSON data) to every subscriber."""
+    message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    with _lock:
+        subscribers = list(_subscribers)
+    for loop, queue in subscribers:
+        try:
+            loop.call_soon_threadsafe(_offer, queue, message)
+        except RuntimeError:
+            # Loop already closed (server shutting down)
+            unsubscribe(queue)
+
+
+async def stream(queue, keepalive=15):
+    """
+    Async generator of SSE text for one subscriber; pings to keep proxies open.
+    Returns once close() is called, so open connections don't hold up shutdown.
+    """
+    closing = _closing[asyncio.get_running_loop()]
+    stop = asyncio.ensure_future(closing.wait())
+    try:
+        yield ": connected\n\n"
+        while not closing.is_set():
+            get = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({get, stop}, timeout=keepalive, return_when=asyncio.FIRST_COMPLETED)
+            if get in done:
+                yield get.result()
+            else:
+                get.cancel()
+                if not done:
+                    yield ": ping\n\n"
+    finally:
+        stop.cancel()
+        unsubscribe(queue)
@@ -0,0 +1,138 @@
+import math
+import os
+from functools import lru_cache
+import numpy as np
+from app.core.config import DATA_DIR
+from app.services import gpm_reader
+
+# Overview pyramid: each level aggregates factor x factor base cells
+LEVELS = (2, 4, 8, 16, 32)
+METHODS = ('max', 'mean')
+
+WORLD = {'top': math.inf, 'bottom': -math.inf, 'left': -math.inf, 'right': math.inf}
+
+
+def _block_axis(axis, factor):
+    """Block centres of a 1-D axis (the last block may be partial)."""
+    n = len(axis)
+    nb = -(-n // factor)
+    padded = np.zeros(nb * factor, dtype=np.float32)
+    padded[:n] = axis
+    counts = np.full(nb, factor, dtype=np.float32)
+    counts[-1] = n - (nb - 1) * factor
+    return padded.reshape(nb, factor).sum(axis=1) / counts
+
+
+def block_reduce(data, fy, fx, how='max'):
+    """
+    Aggregates (lat, lon) data over fy x fx blocks with a single reshape.
+    Edges are zero-padded; 'mean' divides by the real cell count so partial
+    blocks are not diluted. Assumes non-negative data (see read_window).
+    """
+    ny, nx = data.shape
+    by, bx = -(-ny // fy), -(-nx // fx)
+
+    if (by * fy, bx * fx) != data.shape:
+        padded = np.zeros((by * fy, bx * fx), dtype=np.float32)
+        padded[:ny, :nx] = data
+    else:
+        padded = data
+    blocks = padded.reshape(by, fy, bx, fx)
+
+    if how == 'max':
+        return blocks.max(axis=(1, 3))
+    if how == 'mean':
+        cy = np.full(by, fy, dtype=np.float32)
+        cy[-1] = ny - (by - 1) * fy
+        cx = np.full(bx, fx, dtype=np.float32)
+        cx[-1] = nx - (bx - 1) * fx
+        out = blocks.sum(axis=(1, 3), dtype=np.float32)
+        out /= np.outer(cy, cx)
+        return out
+    raise ValueError(f"Unknown aggregation '{how}'")
+
+
+@lru_cache(maxsize=8)
+def _load_overviews(filename, mtime, how):
+    """
+    Builds every pyramid level for one file version from the full grid.
+    Each level is reduced from the base grid so 'mean' stays exact.
+    """
+    lats, lons, data = gpm_reader.read_window(filename, WORLD)
+
+    overviews = {}
+    for factor in LEVELS:
+        if factor > max(data.shape): break
+        level = (
+            _block_axis(lats, factor),
+            _block_axis(lons, factor),
+            block_reduce(data, factor, factor, how),
+        )
+        for arr in level: arr.setflags(write=False)
+        overviews[factor] = level
+    return overviews
+
+
+def get_overviews(filename, how='max'):
+    """Returns {factor: (lats, lons, data)}, cached per file and mtime."""
+    file_path = os.path.join(DATA_DIR, filename)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError("GPM File not found")
+    return _load_overviews(filename, os.path.getmtime(file_path), how)
+
+
+def zoom_to_pixels(bounds, zoom, tile_size=256):
+    """Web-mercator zoom -> (width, height) in screen pixels for bounds."""
+    deg_per_px = 360.0 / (tile_size * 2 ** zoom)
+    width = abs(bounds['right'] - bounds['left']) / deg_per_px
+    height = abs(bounds['top'] - bounds['bottom']) / deg_per_px
+    return max(1, math.ceil(width)), max(1, math.ceil(height))
+
+
+def read_lod(filename, bounds, width=None, height=None, how='max', scratch=False):
+    """
+    Like gpm_reader.read_window, but returns about width x height cells
+    (never fewer than about half the target, nor fewer than 2, per axis).
+    Small windows are read at full resolution; larger ones are cropped from
+    the cached overview closest to the target and reduced the rest of the way.
+    With scratch=True the result may share memory with scratch buffers or the
+    overview cache: read it, don't keep or modify it.
+    """
+    if how not in METHODS:
+        raise ValueError(f"Unknown aggregation '{how}'")
+
+    lats, lons = gpm_reader.read_axes(filename, bounds)
+    fy = max(1, math.ceil(len(lats) / height)) if height else 1
+    fx = max(1, math.ceil(len(lons) / width)) if width else 1
+    factor = max(fy, fx)
+    # Keep at least 2 cells per axis (contouring needs a 2-D grid)
+    factor = min(factor, max(1, min(len(lats), len(lons)) - 1))
+
+    if factor == 1:
+        return gpm_reader.read_window(filename, bounds, scratch)
+
+    # 1. Split factor into (precomputed level) x (rest reduced per request).
+    # level * rest never exceeds factor, so the output is never coarser than
+    # asked for; the split closest to factor wins (ties: the coarser level).
+    # Since level 2 is always a candidate, at most one step of factor is lost.
+    overviews = get_overviews(filename, how)
+    level, rest = 1, factor
+    for f in sorted(overviews):
+        if f <= factor and f * (factor // f) >= level * rest:
+            level, rest = f, factor // f
+
+    # 2. Crop the overview to bounds (or read the base grid)
+    if level == 1:
+        lats, lons, data = gpm_reader.read_window(filename, bounds, scratch)
+    else:
+        o_lats, o_lons, o_data = overviews[level]
+        la0 = int(np.searchsorted(o_lats, min(bounds['bottom'], bounds['top']), side='left'))
+        la1 = int(np.searchsorted(o_lats, max(bounds['bottom'], bounds['top']), side='right'))
+        lo0 = int(np.searchsorted(o_lons, min(bounds['left'], bounds['right']), side='left'))
+        lo1 = int(np.searchsorted(o_lons, max(bounds['left'], bounds['right']), side='right'))
+        lats, lons, data = o_lats[la0:la1], o_lons[lo0:lo1], o_data[la0:la1, lo0:lo1]
+
+    # 3. Finish the reduction on the (small) cropped overview
+    if rest > 1 and data.size:
+        return _block_axis(lats, rest), _block_axis(lons, rest), block_reduce(data, rest, rest, how)
+    return lats, lons, (data if scratch or level == 1 else data.copy())
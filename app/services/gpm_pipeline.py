@@ -0,0 +1,107 @@
+import json
+import threading
+from app.core.config import GRID_TEXTURE_SIZE, PRECOMPUTE_REGIONS
+from app.services import events, gpm_overview, gpm_reader, gpm_render, gpm_service, job_service
+
+# Job kind that runs the pre-computation pipeline (queued by gpm_watcher)
+INGEST_JOB = "ingest"
+
+# Bounds of GET /api/gpm/grid when none are given (the dashboard's request)
+GRID_BOUNDS = {'top': 90, 'bottom': -90, 'left': -180, 'right': 180}
+
+# Serializes catalog updates: an ingest finishing vs. the watcher seeing the file go
+_catalog_lock = threading.Lock()
+
+
+def _is_current(filename, mtime):
+    try:
+        return gpm_render.file_mtime(filename) == mtime
+    except FileNotFoundError:
+        return False
+
+
+def remove(filename):
+    """Drops a deleted granule from the catalog and tells subscribers."""
+    with _catalog_lock:
+        gpm_service.CATALOG.pop(filename, None)
+        events.publish("file", {"filename": filename, "status": "removed"})
+
+
+def submit(filename, mtime, warm=True):
+    """Queues the pipeline for one file version (internal job, see job_service.submit)."""
+    return job_service.submit(INGEST_JOB, {"filename": filename, "mtime": mtime, "warm": warm}, internal=True)
+
+
+@job_service.register(INGEST_JOB, internal=True)
+def ingest_job(filename: str, mtime: float, warm: bool = True, progress=None):
+    """
+    Pre-computation pipeline for a new/changed granule:
+    catalog entry -> grid axes -> overviews -> vectors and plot for
+    PRECOMPUTE_REGIONS -> WebGL grid. Each product is computed with the same
+    cache key its endpoint uses, so the first request for it is a cache hit.
+    With warm=False only the (cheap) catalog stages run.
+    The entry is only published if the file is still this version by then.
+    """
+    def stage(fraction, name):
+        if progress: progress(fraction, name)
+        events.publish("ingest", {"filename": filename, "stage": name, "progress": fraction})
+
+    try:
+        entry = _catalog(filename, stage)
+        if warm:
+            _warm(filename, stage)
+    except OSError:
+        # File removed or replaced while it was being read: not an error
+        if _is_current(filename, mtime):
+            raise
+        entry = None
+
+    with _catalog_lock:
+        if entry is None or not _is_current(filename, mtime):
+            # Removed or replaced meanwhile: the newer state wins
+            stage(1.0, "superseded")
+            return json.dumps({"filename": filename, "status": "superseded"}).encode("utf-8"), "application/json"
+        gpm_service.CATALOG[filename] = entry
+        stage(1.0, "done")
+        events.publish("file", {"filename": filename, "status": "ready", "entry": entry})
+    return json.dumps(entry).encode("utf-8"), "application/json"
+
+
+def _catalog(filename, stage):
+    """Cheap stages of ingest_job: the catalog entry."""
+    # 1. Catalog entry
+    stage(0.0, "catalog")
+    entry = gpm_service.catalog_entry(filename)
+
+    # 2. Grid store (coordinate axes + layout, cached by gpm_reader)
+    stage(0.1, "grid")
+    lats, lons = gpm_reader.read_axes(filename, gpm_overview.WORLD)
+    entry["shape"] = [len(lats), len(lons)]
+    entry["extent"] = {
+        'top': float(lats[-1]), 'bottom': float(lats[0]),
+        'left': float(lons[0]), 'right': float(lons[-1]),
+    }
+    return entry
+
+
+def _warm(filename, stage):
+    """Heavy stages of ingest_job: everything the first requests would compute."""
+    # 3. Overview pyramids (zoomed-out requests, and the plot/grid below)
+    stage(0.2, "overviews")
+    for how in gpm_overview.METHODS:
+        gpm_overview.get_overviews(filename, how)
+
+    # 4. Vectors and plot for configured regions (GET /api/gpm/ with default size)
+    stage(0.4, "vectors")
+    for bounds in PRECOMPUTE_REGIONS:
+        for draw in ("vector", "plot"):
+            width, height = gpm_render.resolve_lod(bounds, draw)
+            gpm_render.render_cached(filename, bounds, draw, width, height, "max")
+
+    # 5. Packed grid for the WebGL dashboard (GET /api/gpm/grid)
+    stage(0.8, "texture")
+    gpm_render.cached_grid(
+        filename, gpm_render.file_mtime(filename),
+        GRID_BOUNDS['top'], GRID_BOUNDS['bottom'], GRID_BOUNDS['left'], GRID_BOUNDS['right'],
+        GRID_TEXTURE_SIZE, GRID_TEXTURE_SIZE, "max",
+    )
@@ -0,0 +1,171 @@
+import os
+from functools import lru_cache
+import h5py
+import numpy as np
+from app.core.config import DATA_DIR
+from app.utils.arrays import scratch as _scratch
+
+# Same variable priority as gpm_service
+CANDIDATES = ['precipitationCal', 'precipitation', 'precip']
+
+
+class _GridAxes:
+    """Cached layout of one GPM file: where the data lives and how it is ordered."""
+
+    def __init__(self, var_path, lats, lons, lat_desc, lon_desc, lon_first, lead_dims, fill):
+        self.var_path = var_path
+        self.lats = lats            # Ascending (float32, read-only)
+        self.lons = lons            # Ascending (float32, read-only)
+        self.lat_desc = lat_desc    # True if stored North -> South
+        self.lon_desc = lon_desc
+        self.lon_first = lon_first  # True if stored as (lon, lat)
+        self.lead_dims = lead_dims  # Singleton dims before the grid, e.g. (time,)
+        self.fill = fill
+
+
+def _find_group(f):
+    return f['Grid'] if 'Grid' in f else f
+
+
+def _find_axis(group, key):
+    # 1-D only, so bounds arrays like 'lat_bnds' are skipped
+    return next(
+        (k for k in group if key in k.lower()
+         and isinstance(group[k], h5py.Dataset) and group[k].ndim == 1),
+        None,
+    )
+
+
+def _ascending(values):
+    values = np.asarray(values, dtype=np.float32)
+    desc = len(values) > 1 and values[0] > values[-1]
+    if desc:
+        values = values[::-1].copy()
+    values.setflags(write=False)
+    return values, desc
+
+
+@lru_cache(maxsize=32)
+def _load_axes(file_path, mtime):
+    """
+    Reads coordinate axes once per file version (mtime is part of the key
+    so a replaced file is re-scanned).
+    """
+    with h5py.File(file_path, 'r') as f:
+        group = _find_group(f)
+
+        var_name = next((v for v in CANDIDATES if v in group), None)
+        if not var_name: raise ValueError("Variable not found in GPM file")
+        lat_name = _find_axis(group, 'lat')
+        lon_name = _find_axis(group, 'lon')
+        if not lat_name or not lon_name: raise ValueError("Coordinates not found in GPM file")
+
+        dset = group[var_name]
+        lats, lat_desc = _ascending(group[lat_name][()])
+        lons, lon_desc = _ascending(group[lon_name][()])
+
+        # Grid dims are the trailing two; anything before must be singleton (time)
+        shape = dset.shape
+        if len(shape) < 2 or any(s != 1 for s in shape[:-2]):
+            raise ValueError(f"Unsupported GPM variable shape {shape}")
+        if shape[-2:] == (len(lons), len(lats)):
+            lon_first = True
+        elif shape[-2:] == (len(lats), len(lons)):
+            lon_first = False
+        else:
+            raise ValueError(f"Variable shape {shape} does not match coordinates")
+
+        fill = dset.attrs.get('_FillValue', dset.attrs.get('missing_value'))
+        fill = float(np.ravel(fill)[0]) if fill is not None else None
+
+        return _GridAxes(
+            dset.name, lats, lons, lat_desc, lon_desc, lon_first,
+            len(shape) - 2, fill,
+        )
+
+
+def _index_range(axis, lo, hi, desc):
+    """
+    Label bounds -> [start, stop) on the ascending axis and on the stored axis.
+    Inclusive on both ends, like xarray's .sel(slice(lo, hi)).
+    """
+    lo, hi = min(lo, hi), max(lo, hi)
+    start = int(np.searchsorted(axis, lo, side='left'))
+    stop = int(np.searchsorted(axis, hi, side='right'))
+    if desc:
+        n = len(axis)
+        return (start, stop), (n - stop, n - start)
+    return (start, stop), (start, stop)
+
+
+def _resolve(filename, bounds):
+    file_path = os.path.join(DATA_DIR, filename)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError("GPM File not found")
+
+    axes = _load_axes(file_path, os.path.getmtime(file_path))
+    lat_rng = _index_range(axes.lats, bounds['bottom'], bounds['top'], axes.lat_desc)
+    lon_rng = _index_range(axes.lons, bounds['left'], bounds['right'], axes.lon_desc)
+    return file_path, axes, lat_rng, lon_rng
+
+
+def read_axes(filename, bounds):
+    """
+    Returns the ascending (lats, lons) read_window would return, without
+    touching the data. Cheap way to size a request.
+    """
+    _, axes, ((la0, la1), _), ((lo0, lo1), _) = _resolve(filename, bounds)
+    return axes.lats[la0:la1], axes.lons[lo0:lo1]
+
+
+def read_window(filename, bounds, scratch=False):
+    """
+    Reads only the hyperslab covering bounds.
+    Returns (lats, lons, data): ascending float32 axes and a float32
+    (lat, lon) grid with fill/NaN/negative values set to 0.
+    With scratch=True, data lives in this thread's 'window' scratch buffer
+    (staging reads use 'stage') and is only valid until the next scratch
+    read on the same thread. Without it nothing touches the scratch pool.
+    """
+    # 1. Resolve bounds to index ranges
+    file_path, axes, lat_rng, lon_rng = _resolve(filename, bounds)
+    (la0, la1), (fla0, fla1) = lat_rng
+    (lo0, lo1), (flo0, flo1) = lon_rng
+    lats = axes.lats[la0:la1]
+    lons = axes.lons[lo0:lo1]
+
+    shape = (len(lats), len(lons))
+    out = _scratch('window', shape) if scratch else np.empty(shape, dtype=np.float32)
+    if out.size == 0:
+        return lats, lons, out
+
+    # 2. Read the hyperslab (stored layout)
+    lead = (0,) * axes.lead_dims
+    if axes.lon_first:
+        sel = lead + (slice(flo0, flo1), slice(fla0, fla1))
+    else:
+        sel = lead + (slice(fla0, fla1), slice(flo0, flo1))
+
+    with h5py.File(file_path, 'r') as f:
+        dset = f[axes.var_path]
+        if not (axes.lon_first or axes.lat_desc or axes.lon_desc):
+            # Already (lat, lon) ascending: read straight into the output
+            dset.read_direct(out, np.s_[sel])
+        else:
+            raw_shape = (len(lons), len(lats)) if axes.lon_first else out.shape
+            raw = _scratch('stage', raw_shape) if scratch else np.empty(raw_shape, dtype=np.float32)
+            dset.read_direct(raw, np.s_[sel])
+
+            # 3. Reorder to (lat, lon) ascending with a single copy
+            view = raw.T if axes.lon_first else raw
+            if axes.lat_desc: view = view[::-1, :]
+            if axes.lon_desc: view = view[:, ::-1]
+            np.copyto(out, view)
+
+    # 4. Mask fill values in place
+    # fmax ignores NaN, so this zeroes NaN and negative fills (-9999.9) in one pass
+    np.fmax(out, 0, out=out)
+    if axes.fill is not None and axes.fill > 0:
+        out[out == np.float32(axes.fill)] = 0
+
+    return lats, lons, out
@@ -0,0 +1,221 @@
+import os
+import io
+import json
+import gzip
+import matplotlib
+# Use Agg backend immediately to prevent server GUI errors
+matplotlib.use('Agg') 
+from matplotlib.figure import Figure
+from geojson import Feature, FeatureCollection, MultiPolygon
+
+from app.core.config import DATA_DIR
+from app.services import gpm_overview, gpm_service
+from app.utils import arrays
+from app.utils.cache import ByteLRU
+
+# GPM products (GeoJSON vectors, PNG plot, packed grid) and their in-memory
+# caches, shared by the gpm router, background jobs and the ingest pipeline.
+# Every cache key includes the file mtime, so a replaced file never hits
+# stale entries.
+
+# Thresholds for rain intensity (mm/hr)
+LEVELS = [0.1, 0.5, 5.0, 10.0, 20.0]
+
+# Pixel size of the draw='plot' figure (figsize * dpi); used as the default
+# level-of-detail target so the scatter never has more points than pixels
+PLOT_SIZE = (1000, 800)
+
+# Memory for rendered responses / packed grids, keyed by file version +
+# parameters. Bounded in bytes (keys include arbitrary bounds, and one
+# full-resolution world response can be tens of MB); bigger single results
+# are served but not kept.
+RESPONSE_CACHE_BYTES = 256 * 2**20
+RESPONSE_CACHE_MAX_ITEM = 16 * 2**20
+GRID_CACHE_BYTES = 128 * 2**20
+
+_responses = ByteLRU(RESPONSE_CACHE_BYTES, RESPONSE_CACHE_MAX_ITEM, size=lambda r: len(r[0]))
+_grids = ByteLRU(GRID_CACHE_BYTES)
+
+# ==========================================
+# 1. CENTRALIZED DATA PROCESSING
+# ==========================================
+class BoundsError(ValueError):
+    """Bounds select no usable part of the grid (reported as a client error)."""
+
+
+def load_and_process_gpm(filename: str, bounds: dict, width: int = None, height: int = None, agg: str = "max"):
+    """
+    Handles loading, slicing, downsampling and smoothing.
+    Returns: (lats, lons, raw_data, smooth_data)
+    Arrays are float32 and backed by per-thread scratch buffers: they are
+    only valid until the next call on the same thread.
+    """
+    # A. Read only the requested window, already (Lat, Lon) ascending
+    # with fill values zeroed. Large extents are block-aggregated down to
+    # about width x height cells (see gpm_overview.read_lod)
+    lats, lons, precip_vals = gpm_overview.read_lod(filename, bounds, width, height, agg, scratch=True)
+    if precip_vals.size == 0:
+        raise BoundsError("Bounds do not overlap the GPM grid")
+    if min(precip_vals.shape) < 2:
+        raise BoundsError("Bounds cover less than 2 grid cells on an axis")
+
+    # B. Generate Smoothed Data (For Vectorizing)
+    # sigma=1 connects scattered pixels into blobs suitable for contouring
+    precip_smooth = arrays.gaussian_smooth(
+        precip_vals, sigma=1.0, out=arrays.scratch('smooth', precip_vals.shape)
+    )
+
+    return lats, lons, precip_vals, precip_smooth
+
+# ==========================================
+# 2. RENDERING
+# ==========================================
+def resolve_lod(bounds: dict, draw: str, width: int = None, height: int = None, zoom: float = None):
+    """Level of detail: explicit size > zoom > plot canvas > full resolution."""
+    if width is None and height is None:
+        if zoom is not None:
+            width, height = gpm_overview.zoom_to_pixels(bounds, zoom)
+        elif draw == "plot":
+            width, height = PLOT_SIZE
+    return width, height
+
+
+def render_arrays(draw: str, bounds: dict, lats, lons, raw_data, smooth_data):
+    """
+    Turns processed arrays into the response body.
+    Returns: (content_bytes, media_type)
+    Uses the object-oriented Figure API (no pyplot global state) so it is
+    safe to call from job worker threads.
+    """
+    # ==========================
+    # MODE A: VECTOR (GeoJSON)
+    # ==========================
+    if draw == "vector":
+        features = []
+        
+        # Use matplotlib to calculate contours purely mathematically (no visible plot)
+        ax = Figure().subplots()
+        smooth_max = float(smooth_data.max())
+        
+        for level in LEVELS:
+            if smooth_max < level: continue
+
+            # Use contour (Lines) + allsegs for robust extraction
+            cs = ax.contour(lons, lats, smooth_data, levels=[level])
+            
+            if len(cs.allsegs) > 0:
+                for vertices in cs.allsegs[0]:
+                    if len(vertices) < 3: continue
+                    
+                    poly_coords = vertices.tolist()
+                    
+                    # --- FIX START ---
+                    # Check if the polygon is closed. If not, snap the last point to the first.
+                    # This eliminates the "Giant Wall" artifact at the edges of the map.
+                    if poly_coords[0] != poly_coords[-1]:
+                        poly_coords.append(poly_coords[0])
+                    # --- FIX END ---
+                    
+                    polygon_structure = [poly_coords] 
+                    
+                    features.append(Feature(
+                        geometry=MultiPolygon([polygon_structure]),
+                        properties={"level": level}
+                    ))
+        
+        # Same encoding as JSONResponse
+        content = json.dumps(FeatureCollection(features), ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+        return content.encode("utf-8"), "application/json"
+
+    # ==========================
+    # MODE B: PLOT (Image)
+    # ==========================
+    elif draw == "plot":
+        fig = Figure(figsize=(10, 8), dpi=100)
+        ax = fig.subplots()
+        
+        # 1. Raw Data Scatter (Blue Dots)
+        pt_lats, pt_lons, pt_vals = arrays.sparse_points(raw_data, lats, lons, 0.1)
+        pt_vals *= 10 # Size relative to intensity
+        ax.scatter(
+            pt_lons, pt_lats, 
+            s=pt_vals,
+            c='cyan', alpha=0.6, label="Raw Data"
+        )
+
+        # 2. Vector Overlay (Red Lines)
+        # Use the exact same smoothing logic as Vector mode to ensure visual match
+        smooth_max = float(smooth_data.max())
+        for level in LEVELS:
+            if smooth_max < level: continue
+            
+            cs = ax.contour(lons, lats, smooth_data, levels=[level], colors=['red'], linewidths=1.5, alpha=0.8)
+            # Keep lines visible on the plot
+
+        # 3. Formatting
+        ax.set_xlim(bounds['left'], bounds['right'])
+        ax.set_ylim(bounds['bottom'], bounds['top'])
+        ax.axis('off') # Transparent background, no axis
+        
+        # Save to Buffer
+        buf = io.BytesIO()
+        fig.savefig(buf, format='png', transparent=True, bbox_inches='tight', pad_inches=0)
+        return buf.getvalue(), "image/png"
+
+    raise ValueError(f"Unknown draw mode '{draw}'")
+
+
+def file_mtime(filename: str):
+    """mtime of a GPM file (the version part of every cache key)."""
+    file_path = os.path.join(DATA_DIR, filename)
+    if not os.path.exists(file_path):
+        raise FileNotFoundError("GPM File not found")
+    return os.path.getmtime(file_path)
+
+
+class RenderError(Exception):
+    """Failure after the data was loaded (reported as a processing error)."""
+
+
+def _render(filename, bounds, draw, width, height, agg):
+    lats, lons, raw_data, smooth_data = load_and_process_gpm(filename, bounds, width, height, agg)
+    try:
+        return render_arrays(draw, bounds, lats, lons, raw_data, smooth_data)
+    except Exception as e:
+        raise RenderError(str(e)) from e
+
+
+def render_cached(filename: str, bounds: dict, draw: str, width: int, height: int, agg: str):
+    """Returns (content_bytes, media_type), from the response cache when possible."""
+    # mtime is only part of the key: a replaced file never hits stale entries
+    key = (
+        filename, file_mtime(filename),
+        bounds['top'], bounds['bottom'], bounds['left'], bounds['right'],
+        draw, width, height, agg,
+    )
+    return _responses.get(key, lambda: _render(filename, bounds, draw, width, height, agg))
+
+
+def render_gpm(filename: str, bounds: dict, draw: str = "vector", width: int = None, height: int = None,
+               zoom: float = None, agg: str = "max", progress=None):
+    """
+    Full GPM request outside of HTTP (used by the job queue).
+    Same level-of-detail rules and cache as GET /api/gpm/.
+    Returns: (content_bytes, media_type)
+    """
+    progress = progress or (lambda fraction, stage: None)
+
+    progress(0.1, "rendering")
+    width, height = resolve_lod(bounds, draw, width, height, zoom)
+    return render_cached(filename, bounds, draw, width, height, agg)
+
+# ==========================================
+# 3. PACKED GRID (WebGL)
+# ==========================================
+def cached_grid(filename, mtime, top, bottom, left, right, width, height, agg):
+    """Gzipped gpm_service.get_binary_grid output, cached per file version and parameters."""
+    bounds = {'top': top, 'bottom': bottom, 'left': left, 'right': right}
+    return _grids.get(
+        (filename, mtime, top, bottom, left, right, width, height, agg),
+        lambda: gzip.compress(gpm_service.get_binary_grid(filename, bounds, width, height, agg), compresslevel=6),
+    )
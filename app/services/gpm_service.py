@@ -1,62 +1,23 @@
 import os
 import struct
-import xarray as xr
 import numpy as np
 from app.core.config import DATA_DIR
+from app.services import gpm_overview, gpm_reader
+from app.utils import arrays, formatting
 
 def _extract_cloud_arrays(filename, bounds, threshold):
     """
-    CORE LOGIC: Opens file, crops to bounds, and returns raw numpy arrays 
+    CORE LOGIC: Reads the window covering bounds and returns raw numpy arrays 
     for points where rain > threshold.
     """
-    file_path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(file_path):
-        raise FileNotFoundError("GPM File not found")
-
-    # 1. Open
-    try:
-        ds = xr.open_dataset(file_path, group='Grid', engine='h5netcdf', decode_times=False)
-    except:
-        ds = xr.open_dataset(file_path, engine='h5netcdf', decode_times=False)
-
-    # 2. Identify Vars
-    candidates = ['precipitationCal', 'precipitation', 'precip']
-    var_name = next((v for v in candidates if v in ds), None)
-    lat_name = next((k for k in ds.coords if 'lat' in k.lower()), 'lat')
-    lon_name = next((k for k in ds.coords if 'lon' in k.lower()), 'lon')
+    # 1. Read & Crop (float32, fill values already zeroed)
+    lats, lons, data = gpm_reader.read_window(filename, bounds, scratch=True)
 
-    if not var_name: raise ValueError("Variable not found")
-
-    # 3. Crop
-    lat_slice = slice(min(bounds['bottom'], bounds['top']), max(bounds['bottom'], bounds['top']))
-    lon_slice = slice(min(bounds['left'], bounds['right']), max(bounds['left'], bounds['right']))
-    
-    try:
-        ds_cropped = ds.sel({lat_name: lat_slice, lon_name: lon_slice})
-        if ds_cropped[var_name].size == 0: ds_cropped = ds
-    except:
-        ds_cropped = ds
-
-    # 4. Extract
-    data = ds_cropped[var_name].squeeze().values
-    lats = ds_cropped[lat_name].values
-    lons = ds_cropped[lon_name].values
-
-    if data.shape == (len(lons), len(lats)):
-        data = data.T 
-
-    # 5. Filter Sparse Data (Rain > Threshold)
-    # Get indices
-    y_idxs, x_idxs = np.where(data > threshold)
-    
-    # Extract values and cast to Float32 (Standard for WebGL/Binary)
-    valid_rain = data[y_idxs, x_idxs].astype(np.float32)
-    valid_lats = lats[y_idxs].astype(np.float32)
-    valid_lons = lons[x_idxs].astype(np.float32)
+    # 2. Filter Sparse Data (Rain > Threshold)
+    # Float32 is the standard for WebGL/Binary
+    valid_lats, valid_lons, valid_rain = arrays.sparse_points(data, lats, lons, threshold)
     
-    max_val = float(np.max(data)) if len(valid_rain) > 0 else 0.0
-    
-    ds.close()
+    max_val = float(data.max()) if len(valid_rain) > 0 else 0.0
     
     return valid_lats, valid_lons, valid_rain, max_val
 
@@ -64,116 +25,100 @@ def process_local_file(filename, bounds):
     """
     Opens HDF5, crops to bounds, returns (lats, lons, data).
     """
-    file_path = os.path.join(DATA_DIR, filename)
-    if not os.path.exists(file_path):
-        raise FileNotFoundError("GPM File not found")
-
-    # 1. Open
-    try:
-        ds = xr.open_dataset(file_path, group='Grid', engine='h5netcdf', decode_times=False)
-    except:
-        ds = xr.open_dataset(file_path, engine='h5netcdf', decode_times=False)
-
-    # 2. Identify Variables
-    candidates = ['precipitationCal', 'precipitation', 'precip']
-    var_name = next((v for v in candidates if v in ds), None)
-    if not var_name: raise ValueError("Variable not found in GPM file")
-
-    lat_name = next((k for k in ds.coords if 'lat' in k.lower()), 'lat')
-    lon_name = next((k for k in ds.coords if 'lon' in k.lower()), 'lon')
-
-    # 3. Crop (Optimization)
-    lat_slice = slice(min(bounds['bottom'], bounds['top']), max(bounds['bottom'], bounds['top']))
-    lon_slice = slice(min(bounds['left'], bounds['right']), max(bounds['left'], bounds['right']))
-    
-    try:
-        ds_cropped = ds.sel({lat_name: lat_slice, lon_name: lon_slice})
-        if ds_cropped[var_name].size == 0: ds_cropped = ds # Fallback
-    except:
-        ds_cropped = ds
-
-    # 4. Extract Arrays
-    data = ds_cropped[var_name].squeeze().values
-    lats = ds_cropped[lat_name].values
-    lons = ds_cropped[lon_name].values
-
-    # Transpose if (lon, lat)
-    if data.shape == (len(lons), len(lats)):
-        data = data.T 
-
-    ds.close()
-    return lats, lons, data
+    return gpm_reader.read_window(filename, bounds)
 
 def list_available_files():
     if not os.path.exists(DATA_DIR): return []
     return [f for f in os.listdir(DATA_DIR) if f.endswith(('.HDF5', '.nc', '.nc4'))]
 
-def get_sparse_cloud_data(filename, bounds, threshold=0.1):
+# filename -> catalog entry, filled in by the ingest pipeline (see gpm router)
+CATALOG = {}
+
+def catalog_entry(filename):
     """
-    Extracts precipitation data and converts it into a sparse JSON-friendly format.
-    Only returns points where rain > threshold.
+    Basic metadata for one granule (stat + name parsing, no data read).
     """
     file_path = os.path.join(DATA_DIR, filename)
     if not os.path.exists(file_path):
         raise FileNotFoundError("GPM File not found")
 
-    # 1. Open & Auto-Detect (Same logic as before)
-    try:
-        ds = xr.open_dataset(file_path, group='Grid', engine='h5netcdf', decode_times=False)
-    except:
-        ds = xr.open_dataset(file_path, engine='h5netcdf', decode_times=False)
-
-    candidates = ['precipitationCal', 'precipitation', 'precip']
-    var_name = next((v for v in candidates if v in ds), None)
-    if not var_name: raise ValueError("Variable not found")
+    st = os.stat(file_path)
+    return {
+        "filename": filename,
+        "label": formatting.parse_gpm_filename(filename),
+        "size": st.st_size,
+        "mtime": st.st_mtime,
+    }
 
-    lat_name = next((k for k in ds.coords if 'lat' in k.lower()), 'lat')
-    lon_name = next((k for k in ds.coords if 'lon' in k.lower()), 'lon')
+# Packed grid for the browser (WebGL texture), see get_binary_grid
+GRID_MAGIC = b"GPMG"
+GRID_HEADER = "<4sIIf"   # magic, ny, nx, scale
+GRID_SCALE = 0.01        # mm/hr per uint16 step (max 655.35 mm/hr)
 
-    # 2. Crop to Bounds
-    # Ensure we don't load the whole world if we only need Java
-    lat_slice = slice(min(bounds['bottom'], bounds['top']), max(bounds['bottom'], bounds['top']))
-    lon_slice = slice(min(bounds['left'], bounds['right']), max(bounds['left'], bounds['right']))
-    
-    try:
-        ds_cropped = ds.sel({lat_name: lat_slice, lon_name: lon_slice})
-    except:
-        ds_cropped = ds
-
-    # 3. Extract Arrays
-    data = ds_cropped[var_name].squeeze().values
-    lats = ds_cropped[lat_name].values
-    lons = ds_cropped[lon_name].values
+def get_binary_grid(filename, bounds, width=None, height=None, how='max'):
+    """
+    Packs a (lat, lon) grid into a compact little-endian binary blob:
+      header  GRID_HEADER (16 bytes)
+      lats    float32[ny] ascending
+      lons    float32[nx] ascending
+      values  uint16[ny * nx] row-major (row 0 = southmost), rain / GRID_SCALE
+    Large extents are downsampled to ~width x height like the GeoJSON path.
+    """
+    # 1. Read (float32, fill values zeroed, possibly downsampled)
+    lats, lons, data = gpm_overview.read_lod(filename, bounds, width, height, how, scratch=True)
+    ny, nx = data.shape
+
+    # 2. Quantize to uint16 through scratch buffers
+    scaled = arrays.scratch('quant_f', data.shape)
+    np.multiply(data, 1.0 / GRID_SCALE, out=scaled)
+    np.minimum(scaled, np.iinfo(np.uint16).max, out=scaled)
+    np.rint(scaled, out=scaled)
+    values = arrays.scratch('quant_u16', data.shape, np.uint16)
+    np.copyto(values, scaled, casting='unsafe')
+
+    # 3. Pack
+    return b"".join([
+        struct.pack(GRID_HEADER, GRID_MAGIC, ny, nx, GRID_SCALE),
+        lats.astype('<f4', copy=False).tobytes(),
+        lons.astype('<f4', copy=False).tobytes(),
+        values.astype('<u2', copy=False).tobytes(),
+    ])
 
-    # Transpose if needed (we want shape: [lat, lon])
-    if data.shape == (len(lons), len(lats)):
-        data = data.T 
+def get_sparse_cloud_data(filename, bounds, threshold=0.1):
+    """
+    Extracts precipitation data and converts it into a sparse JSON-friendly format.
+    Only returns points where rain > threshold.
+    """
+    # 1. Read & Crop to Bounds
+    # Only the hyperslab for the window is read, never the whole world
+    lats, lons, data = gpm_reader.read_window(filename, bounds, scratch=True)
 
-    # 4. Create Sparse Data (The Magic Step)
+    # 2. Create Sparse Data (The Magic Step)
     # Find indices where it is actually raining
     # > threshold (0.1 mm/hr) filters out clear sky
-    y_idxs, x_idxs = np.where(data > threshold)
-    
-    # Extract values at those indices
-    valid_rain = data[y_idxs, x_idxs]
-    valid_lats = lats[y_idxs]
-    valid_lons = lons[x_idxs]
+    valid_lats, valid_lons, valid_rain = arrays.sparse_points(data, lats, lons, threshold)
 
-    # 5. Structure for Javascript
+    # 3. Structure for Javascript
     # We return a list of objects or a "Columnar" format (more efficient for JS parsing)
     # Columnar is smaller/faster: { lats: [...], lons: [...], vals: [...] }
     
     # Convert numpy arrays to python lists for JSON serialization
-    # Rounding float values significantly reduces JSON size
+    # Rounding float values significantly reduces JSON size. Rounding happens in
+    # one reused float64 buffer: float32 would serialize as -9.951000213623047
+    buf = arrays.scratch('round', valid_rain.shape, np.float64)
+
+    def _rounded(values, decimals):
+        np.copyto(buf, values)
+        return np.round(buf, decimals, out=buf).tolist()
+
     response_data = {
-        "lats": np.round(valid_lats, 3).tolist(),
-        "lons": np.round(valid_lons, 3).tolist(),
-        "vals": np.round(valid_rain, 2).tolist(),
+        "lats": _rounded(valid_lats, 3),
+        "lons": _rounded(valid_lons, 3),
+        "vals": _rounded(valid_rain, 2),
         "stats": {
-            "max": float(np.max(data)),
+            "max": float(data.max()) if data.size else 0.0,
             "count": len(valid_rain)
         }
     }
 
-    ds.close()
-    return response_data
\ No newline at end of file
+    return response_data
@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+import traceback
+from app.core.config import DATA_DIR, WATCH_POLL_INTERVAL, WATCH_SETTLE, WATCH_WARM_ON_START
+from app.services import events, gpm_pipeline, gpm_service
+
+# inotify through watchdog when available; otherwise (or if the observer cannot
+# start, e.g. inotify watch limits) the directory is polled.
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+class _Wake(FileSystemEventHandler if Observer else object):
+    """Any filesystem event just wakes the scan loop; the scan works out what changed."""
+
+    def __init__(self, wake):
+        self.wake = wake
+
+    def on_any_event(self, event):
+        self.wake.set()
+
+
+class GpmWatcher:
+    """
+    Watches DATA_DIR for new/changed/removed GPM granules.
+    A file is ingested once its (mtime, size) is unchanged for WATCH_SETTLE
+    seconds, so half-copied files are skipped until they are complete.
+    """
+
+    def __init__(self):
+        self.known = {}      # filename -> (mtime, size) already handed to the pipeline
+        self.pending = {}    # filename -> ((mtime, size), first seen) not settled yet
+        self.mode = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._observer = None
+
+    def _stat(self):
+        state = {}
+        for name in gpm_service.list_available_files():
+            try:
+                st = os.stat(os.path.join(DATA_DIR, name))
+            except FileNotFoundError:
+                continue
+            state[name] = (st.st_mtime, st.st_size)
+        return state
+
+    def _ingest(self, name, mtime, warm=True):
+        events.publish("file", {"filename": name, "status": "detected"})
+        gpm_pipeline.submit(name, mtime, warm)
+
+    def scan(self):
+        """One pass: publish removals, ingest settled files. Returns True if files are still settling."""
+        state = self._stat()
+
+        for name in set(self.known) - set(state):
+            del self.known[name]
+            gpm_pipeline.remove(name)
+
+        for name, stat in state.items():
+            if self.known.get(name) == stat:
+                continue
+            seen, since = self.pending.get(name, (None, None))
+            if seen != stat:
+                self.pending[name] = (stat, time.monotonic())
+            elif time.monotonic() - since >= WATCH_SETTLE:
+                del self.pending[name]
+                self.known[name] = stat
+                self._ingest(name, stat[0])
+
+        for name in set(self.pending) - set(state):
+            del self.pending[name]
+        return bool(self.pending)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                settling = self.scan()
+            except Exception:
+                traceback.print_exc()
+                settling = False
+            if settling:
+                timeout = WATCH_SETTLE
+            elif self.mode == "inotify":
+                timeout = None
+            else:
+                timeout = WATCH_POLL_INTERVAL
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def start(self):
+        # Files already present: all catalogued, but only the newest few are warmed
+        state = self._stat()
+        newest = set(sorted(state, key=lambda n: state[n][0], reverse=True)[:WATCH_WARM_ON_START])
+        self.known = dict(state)
+        for name in sorted(state, key=lambda n: n not in newest):
+            self._ingest(name, state[name][0], warm=name in newest)
+
+        self.mode = "polling"
+        if Observer is not None:
+            try:
+                self._observer = Observer()
+                self._observer.schedule(_Wake(self._wake), DATA_DIR, recursive=False)
+                self._observer.start()
+                self.mode = "inotify"
+            except Exception as e:
+                print(f"Warning: file watcher unavailable ({e}), polling every {WATCH_POLL_INTERVAL}s")
+                self._observer = None
+
+        self._thread = threading.Thread(target=self._run, name="gpm-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._observer:
+            self._observer.stop()
+            self._observer.join()
+        if self._thread:
+            self._thread.join()
+
+
+watcher = GpmWatcher()
@@ -0,0 +1,206 @@
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import JOBS_DIR, JOB_WORKERS, JOB_TTL, JOB_QUEUE_SIZE
+
+# In-process job queue: a bounded thread pool, an in-memory job table and
+# results stored as files under JOBS_DIR. No external broker needed, but job
+# ids are only known to the process that accepted them (run a single worker).
+
+# kind -> callable(**params, progress=...) returning (content_bytes, media_type)
+TASKS = {}
+# kind -> callable(params) returning the version of the task's inputs (e.g. a file mtime)
+_VERSIONS = {}
+# kind -> callable(params) raising ValueError for values the task would reject
+_CHECKS = {}
+# Kinds only the server itself may submit (not exposed through /api/jobs)
+_INTERNAL = set()
+
+_jobs = {}
+_lock = threading.Lock()
+_pool = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+
+class QueueFull(Exception):
+    """JOB_QUEUE_SIZE jobs are already queued or running."""
+
+
+def register(kind, version=None, check=None, internal=False):
+    """
+    Decorator: exposes a function as a job kind.
+    `version(params)` identifies the current inputs (e.g. a data file's mtime):
+    it is part of the job id, so a job whose inputs changed is run again
+    instead of returning the old result.
+    `check(params)` validates normalized params at submission (ValueError),
+    so bad values are rejected up front instead of failing in a worker.
+    internal=True kinds can only be submitted with submit(..., internal=True).
+    """
+    def wrap(fn):
+        TASKS[kind] = fn
+        if internal:
+            _INTERNAL.add(kind)
+        if version:
+            _VERSIONS[kind] = version
+        if check:
+            _CHECKS[kind] = check
+        return fn
+    return wrap
+
+
+def _job_id(kind, params):
+    # Identical submissions hash to the same id, which is how they are de-duplicated
+    version = _VERSIONS[kind](params) if kind in _VERSIONS else None
+    key = json.dumps({"kind": kind, "params": params, "version": version}, sort_keys=True, default=str)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+
+
+def _normalize(fn, params):
+    """
+    Binds params to the task signature (TypeError if they don't fit), fills in
+    defaults and casts simple annotated types, so that e.g. {"toplat": -5} and
+    {"toplat": -5.0, "draw": "vector"} are the same job. Required params may
+    not be null (ValueError).
+    """
+    if "progress" in params:
+        raise TypeError("'progress' is not a job parameter")
+    sig = inspect.signature(fn)
+    bound = sig.bind(**params)
+    bound.apply_defaults()
+
+    normalized = {}
+    for name, value in bound.arguments.items():
+        if name == "progress": continue
+        param = sig.parameters[name]
+        if value is None and param.default is inspect.Parameter.empty:
+            raise ValueError(f"'{name}' is required")
+        annotation = param.annotation
+        if value is not None and annotation in (int, float, str):
+            value = annotation(value)
+        normalized[name] = value
+    return normalized
+
+
+def _result_path(job_id):
+    return os.path.join(JOBS_DIR, job_id)
+
+
+def _public(job):
+    return {k: v for k, v in job.items() if not k.startswith("_")}
+
+
+def _purge_expired():
+    """Drops finished jobs past their TTL (called with _lock held)."""
+    now = time.time()
+    for job_id in [j for j, job in _jobs.items() if job["expires"] and job["expires"] < now]:
+        del _jobs[job_id]
+        if os.path.exists(_result_path(job_id)):
+            os.remove(_result_path(job_id))
+
+
+def _run(job_id):
+    job = _jobs[job_id]
+
+    def progress(fraction, stage):
+        job["progress"] = round(float(fraction), 3)
+        job["stage"] = stage
+
+    job["status"] = "running"
+    job["started"] = time.time()
+    try:
+        content, media_type = TASKS[job["kind"]](**job["_params"], progress=progress)
+
+        # Write then rename so a half-written file is never served
+        tmp = _result_path(job_id) + ".part"
+        with open(tmp, "wb") as f:
+            f.write(content)
+        os.replace(tmp, _result_path(job_id))
+
+        job["_media_type"] = media_type
+        job["status"] = "done"
+        job["progress"] = 1.0
+        job["stage"] = "done"
+    except Exception as e:
+        traceback.print_exc()
+        job["status"] = "error"
+        job["error"] = str(e)
+    finally:
+        job["finished"] = time.time()
+        job["expires"] = job["finished"] + JOB_TTL
+
+
+def submit(kind, params, internal=False):
+    """
+    Queues a job (or returns the existing one for identical kind+params).
+    Raises KeyError for unknown kinds, TypeError/ValueError for bad params
+    and QueueFull when JOB_QUEUE_SIZE jobs are already pending.
+    internal=True is for the server's own jobs: it allows internal kinds and
+    is not limited by (nor counted against) JOB_QUEUE_SIZE.
+    """
+    if kind not in TASKS or (kind in _INTERNAL and not internal):
+        raise KeyError(f"Unknown job kind '{kind}'")
+    params = _normalize(TASKS[kind], params)
+    if kind in _CHECKS:
+        _CHECKS[kind](params)
+
+    job_id = _job_id(kind, params)
+    with _lock:
+        _purge_expired()
+        job = _jobs.get(job_id)
+        if job and job["status"] != "error":
+            return _public(job)
+        pending = sum(j["status"] in ("queued", "running") and j["kind"] not in _INTERNAL for j in _jobs.values())
+        if not internal and pending >= JOB_QUEUE_SIZE:
+            raise QueueFull(f"{JOB_QUEUE_SIZE} jobs are already pending, try again later")
+
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "progress": 0.0,
+            "stage": "queued",
+            "error": None,
+            "created": time.time(),
+            "started": None,
+            "finished": None,
+            "expires": None,
+            "_params": params,
+            "_media_type": None,
+        }
+        _jobs[job_id] = job
+    _pool.submit(_run, job_id)
+    return _public(job)
+
+
+def get(job_id):
+    """Job status dict, or None if unknown/expired."""
+    with _lock:
+        _purge_expired()
+        job = _jobs.get(job_id)
+        return _public(job) if job else None
+
+
+def get_result(job_id):
+    """
+    Returns (file_path, media_type) for a finished job.
+    Raises KeyError if unknown/expired, ValueError if not done yet.
+    """
+    with _lock:
+        _purge_expired()
+        job = _jobs.get(job_id)
+        if not job:
+            raise KeyError(job_id)
+        if job["status"] != "done":
+            raise ValueError(f"Job is {job['status']}")
+        return _result_path(job_id), job["_media_type"]
+
+
+# Results left by previous runs have no job record; clear out the expired ones
+for _name in os.listdir(JOBS_DIR):
+    _path = os.path.join(JOBS_DIR, _name)
+    if os.path.getmtime(_path) < time.time() - JOB_TTL:
+        os.remove(_path)
@@ -1,4 +1,5 @@
 import os
+import uuid
 import httpx
 import numpy as np
 import xarray as xr
@@ -18,7 +19,8 @@ async def fetch_and_process_gfs(date, hour, bounds):
         "rightlon": bounds['right'], "bottomlat": bounds['bottom'],
     }
     
-    tmp_file = os.path.join(TEMP_DIR, f"gfs_{date}_{hour}.grib2")
+    # Unique per call: concurrent requests for the same run must not share a file
+    tmp_file = os.path.join(TEMP_DIR, f"gfs_{date}_{hour}_{uuid.uuid4().hex}.grib2")
 
     # 1. Download
     async with httpx.AsyncClient() as client:
@@ -30,7 +32,7 @@ async def fetch_and_process_gfs(date, hour, bounds):
 
     # 2. Process
     try:
-        ds = xr.open_dataset(tmp_file, engine='cfgrib', backend_kwargs={'filter_by_keys': {'shortName': 'prate'}})
+        ds = xr.open_dataset(tmp_file, engine='cfgrib', backend_kwargs={'filter_by_keys': {'shortName': 'prate'}, 'indexpath': ''})
         
         # Convert units (kg/m^2/s -> mm/hr)
         data = ds['prate'].values * 3600
@@ -0,0 +1,204 @@
+// Client-side GPM renderer.
+// Fetches the packed uint16 grid (/api/gpm/grid) once per file, uploads it as
+// a WebGL2 integer texture and colours it in the fragment shader. Pan (drag),
+// zoom (wheel) and threshold changes only update uniforms: no server round trip.
+const GpmGL = (() => {
+    const MAGIC = 'GPMG';
+    const HEADER_BYTES = 16;   // <4sIIf: magic, ny, nx, scale
+    // Requested grid size; GRID_TEXTURE_SIZE in app/core/config.py, pre-computed on ingest
+    const GRID_SIZE = 4096;
+
+    const VERT = `#version 300 es
+    in vec2 pos;
+    out vec2 uv;
+    void main() {
+        uv = pos * 0.5 + 0.5;
+        gl_Position = vec4(pos, 0.0, 1.0);
+    }`;
+
+    const FRAG = `#version 300 es
+    precision highp float;
+    precision highp usampler2D;
+    in vec2 uv;
+    out vec4 color;
+    uniform usampler2D grid;
+    uniform vec4 view;        // lon_min, lat_min, lon_max, lat_max on screen
+    uniform vec4 extent;      // lon0, lat0, lon1, lat1 (first/last cell centres)
+    uniform ivec2 size;       // nx, ny
+    uniform vec2 degPerPx;
+    uniform float scale;      // mm/hr per uint16 step
+    uniform float threshold;
+
+    // Same intensity bands as the server (LEVELS in gpm router)
+    vec3 ramp(float v) {
+        if (v < 0.5)  return vec3(0.0, 1.0, 1.0);
+        if (v < 5.0)  return vec3(0.0, 0.45, 1.0);
+        if (v < 10.0) return vec3(1.0, 1.0, 0.0);
+        if (v < 20.0) return vec3(1.0, 0.5, 0.0);
+        return vec3(1.0, 0.0, 0.0);
+    }
+
+    void main() {
+        vec2 ll = mix(view.xy, view.zw, uv);
+        vec3 bg = vec3(0.133);
+
+        // 10 degree graticule
+        vec2 d = abs(fract(ll / 10.0 + 0.5) - 0.5) * 10.0 / degPerPx;
+        if (min(d.x, d.y) < 0.5) bg = vec3(0.3);
+
+        vec2 f = (ll - extent.xy) / (extent.zw - extent.xy) * vec2(size - 1);
+        ivec2 ij = ivec2(floor(f + 0.5));
+        if (any(lessThan(ij, ivec2(0))) || any(greaterThanEqual(ij, size))) {
+            color = vec4(bg, 1.0);
+            return;
+        }
+        float v = float(texelFetch(grid, ij, 0).r) * scale;
+        color = vec4(v > threshold ? mix(bg, ramp(v), 0.85) : bg, 1.0);
+    }`;
+
+    let canvas, gl, prog, loc;
+    const files = new Map();   // filename -> {tex, nx, ny, scale, extent}; see forget()
+    let current = null;
+    const state = { lon: 110, lat: -7.5, degPerPx: 0.02, threshold: 0.1 };
+
+    function compile(type, src) {
+        const s = gl.createShader(type);
+        gl.shaderSource(s, src);
+        gl.compileShader(s);
+        if (!gl.getShaderParameter(s, gl.COMPILE_STATUS)) throw new Error(gl.getShaderInfoLog(s));
+        return s;
+    }
+
+    function init(el) {
+        canvas = el;
+        gl = canvas.getContext('webgl2');
+        if (!gl) throw new Error('WebGL2 is not available in this browser.');
+
+        prog = gl.createProgram();
+        gl.attachShader(prog, compile(gl.VERTEX_SHADER, VERT));
+        gl.attachShader(prog, compile(gl.FRAGMENT_SHADER, FRAG));
+        gl.linkProgram(prog);
+        if (!gl.getProgramParameter(prog, gl.LINK_STATUS)) throw new Error(gl.getProgramInfoLog(prog));
+        loc = {};
+        ['grid', 'view', 'extent', 'size', 'degPerPx', 'scale', 'threshold']
+            .forEach(n => loc[n] = gl.getUniformLocation(prog, n));
+
+        // Full-screen quad
+        gl.bindBuffer(gl.ARRAY_BUFFER, gl.createBuffer());
+        gl.bufferData(gl.ARRAY_BUFFER, new Float32Array([-1, -1, 1, -1, -1, 1, 1, 1]), gl.STATIC_DRAW);
+        const pos = gl.getAttribLocation(prog, 'pos');
+        gl.enableVertexAttribArray(pos);
+        gl.vertexAttribPointer(pos, 2, gl.FLOAT, false, 0, 0);
+
+        // Pan & zoom
+        let drag = null;
+        canvas.addEventListener('mousedown', e => drag = { x: e.clientX, y: e.clientY });
+        window.addEventListener('mouseup', () => drag = null);
+        window.addEventListener('mousemove', e => {
+            if (!drag) return;
+            const k = state.degPerPx * devicePixelRatio;
+            state.lon -= (e.clientX - drag.x) * k;
+            state.lat += (e.clientY - drag.y) * k;
+            drag = { x: e.clientX, y: e.clientY };
+            draw();
+        });
+        canvas.addEventListener('wheel', e => {
+            e.preventDefault();
+            // Zoom around the cursor
+            const r = canvas.getBoundingClientRect();
+            const dx = (e.clientX - r.left - r.width / 2) * devicePixelRatio;
+            const dy = (e.clientY - r.top - r.height / 2) * devicePixelRatio;
+            const before = state.degPerPx;
+            state.degPerPx = Math.min(0.5, Math.max(0.0005, before * Math.exp(e.deltaY * 0.001)));
+            state.lon += dx * (before - state.degPerPx);
+            state.lat -= dy * (before - state.degPerPx);
+            draw();
+        }, { passive: false });
+        window.addEventListener('resize', draw);
+    }
+
+    async function load(file) {
+        if (files.has(file)) return files.get(file);
+
+        const size = Math.min(GRID_SIZE, gl.getParameter(gl.MAX_TEXTURE_SIZE));
+        const res = await fetch(`/api/gpm/grid?filename=${encodeURIComponent(file)}&width=${size}&height=${size}`);
+        if (!res.ok) throw new Error(await res.text());
+        const buf = await res.arrayBuffer();
+
+        const dv = new DataView(buf);
+        const magic = String.fromCharCode(...new Uint8Array(buf, 0, 4));
+        if (magic !== MAGIC) throw new Error('Unexpected grid format');
+        const ny = dv.getUint32(4, true), nx = dv.getUint32(8, true), scale = dv.getFloat32(12, true);
+        const lats = new Float32Array(buf, HEADER_BYTES, ny);
+        const lons = new Float32Array(buf, HEADER_BYTES + 4 * ny, nx);
+        const vals = new Uint16Array(buf, HEADER_BYTES + 4 * (ny + nx), nx * ny);
+
+        const tex = gl.createTexture();
+        gl.bindTexture(gl.TEXTURE_2D, tex);
+        gl.pixelStorei(gl.UNPACK_ALIGNMENT, 1);
+        gl.texImage2D(gl.TEXTURE_2D, 0, gl.R16UI, nx, ny, 0, gl.RED_INTEGER, gl.UNSIGNED_SHORT, vals);
+        gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_MIN_FILTER, gl.NEAREST);
+        gl.texParameteri(gl.TEXTURE_2D, gl.TEXTURE_MAG_FILTER, gl.NEAREST);
+
+        const entry = { tex, nx, ny, scale, extent: [lons[0], lats[0], lons[nx - 1], lats[ny - 1]] };
+        files.set(file, entry);
+        return entry;
+    }
+
+    function draw() {
+        if (!current || canvas.style.display === 'none') return;
+        const w = Math.round(canvas.clientWidth * devicePixelRatio);
+        const h = Math.round(canvas.clientHeight * devicePixelRatio);
+        if (canvas.width !== w || canvas.height !== h) { canvas.width = w; canvas.height = h; }
+        gl.viewport(0, 0, w, h);
+
+        const k = state.degPerPx;
+        gl.useProgram(prog);
+        gl.activeTexture(gl.TEXTURE0);
+        gl.bindTexture(gl.TEXTURE_2D, current.tex);
+        gl.uniform1i(loc.grid, 0);
+        gl.uniform4f(loc.view, state.lon - w / 2 * k, state.lat - h / 2 * k, state.lon + w / 2 * k, state.lat + h / 2 * k);
+        gl.uniform4f(loc.extent, ...current.extent);
+        gl.uniform2i(loc.size, current.nx, current.ny);
+        gl.uniform2f(loc.degPerPx, k, k);
+        gl.uniform1f(loc.scale, current.scale);
+        gl.uniform1f(loc.threshold, state.threshold);
+        gl.drawArrays(gl.TRIANGLE_STRIP, 0, 4);
+    }
+
+    // Show `file`, framing bounds {top, bottom, left, right}
+    async function show(el, file, b) {
+        if (!gl) init(el);
+        canvas.style.display = 'block';
+        current = await load(file);
+        state.lon = (b.left + b.right) / 2;
+        state.lat = (b.top + b.bottom) / 2;
+        state.degPerPx = Math.max(
+            Math.abs(b.right - b.left) / (canvas.clientWidth * devicePixelRatio),
+            Math.abs(b.top - b.bottom) / (canvas.clientHeight * devicePixelRatio));
+        draw();
+    }
+
+    function setThreshold(v) {
+        state.threshold = v;
+        draw();
+    }
+
+    // Drops the cached grid of `file` (replaced or removed on the server).
+    // If it is on screen it is fetched again, unless reload is false.
+    async function forget(file, reload = true) {
+        const entry = files.get(file);
+        if (!entry) return;
+        files.delete(file);
+        if (entry === current) {
+            current = null;
+            if (reload) {
+                try { current = await load(file); } catch (e) { console.warn('GPM grid reload failed:', e); }
+            }
+            draw();
+        }
+        gl.deleteTexture(entry.tex);
+    }
+
+    return { show, setThreshold, forget };
+})();
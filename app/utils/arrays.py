@@ -0,0 +1,67 @@
+import threading
+from functools import lru_cache
+import numpy as np
+from scipy.ndimage import correlate1d
+from app.core.config import SCRATCH_MAX_BYTES
+
+# Per-thread scratch pool. Each worker thread keeps its own grow-only
+# buffers, so steady-state requests reuse memory instead of allocating.
+# Buffers are capped at SCRATCH_MAX_BYTES: a rare huge request gets a
+# temporary array instead of pinning that much memory for the thread's life.
+_local = threading.local()
+
+
+def scratch(name, shape, dtype=np.float32):
+    """
+    Returns an uninitialised array of shape backed by this thread's buffer `name`.
+    Contents are only valid until the next scratch(name, ...) call on the same thread.
+    """
+    size = int(np.prod(shape))
+    if size * np.dtype(dtype).itemsize > SCRATCH_MAX_BYTES:
+        return np.empty(shape, dtype=dtype)
+    pool = _local.__dict__.setdefault('pool', {})
+    buf = pool.get(name)
+    if buf is None or buf.size < size or buf.dtype != dtype:
+        buf = np.empty(max(size, 1), dtype=dtype)
+        pool[name] = buf
+    return buf[:size].reshape(shape)
+
+
+@lru_cache(maxsize=8)
+def _gaussian_kernel(sigma, truncate=4.0):
+    # Same weights as scipy.ndimage.gaussian_filter
+    radius = int(truncate * sigma + 0.5)
+    x = np.arange(-radius, radius + 1, dtype=np.float64)
+    w = np.exp(-0.5 / sigma ** 2 * x ** 2)
+    w /= w.sum()
+    w.setflags(write=False)
+    return w
+
+
+def gaussian_smooth(data, sigma=1.0, out=None):
+    """
+    Separable Gaussian blur of a 2-D grid (rows then columns), written into
+    `out`. The intermediate pass uses the 'smooth_tmp' scratch buffer.
+    Equivalent to gaussian_filter(data, sigma) with mode='reflect'.
+    """
+    if out is None:
+        out = np.empty(data.shape, dtype=np.float32)
+    w = _gaussian_kernel(float(sigma))
+    tmp = scratch('smooth_tmp', data.shape, out.dtype)
+    correlate1d(data, w, axis=0, output=tmp, mode='reflect')
+    correlate1d(tmp, w, axis=1, output=out, mode='reflect')
+    return out
+
+
+def sparse_points(data, lats, lons, threshold):
+    """
+    Cells of a (lat, lon) grid where data > threshold.
+    Returns float32 (lats, lons, vals) without building a meshgrid.
+    """
+    idx = np.flatnonzero(data > threshold)
+    rows, cols = np.divmod(idx, data.shape[1])
+    return (
+        lats[rows].astype(np.float32, copy=False),
+        lons[cols].astype(np.float32, copy=False),
+        data.ravel()[idx].astype(np.float32, copy=False),
+    )
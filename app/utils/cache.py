@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+
+
+class ByteLRU:
+    """
+    Least-recently-used cache bounded by the total size of its values rather
+    than their number, so entries of very different sizes (a small GeoJSON
+    vs. a full-resolution world) cannot pin an unbounded amount of memory.
+    Values larger than max_item are returned but not kept: one huge result
+    does not flush everything else. Failed computations are not cached.
+    """
+
+    def __init__(self, max_bytes, max_item=None, size=len):
+        self.max_bytes = max_bytes
+        self.max_item = max_item if max_item is not None else max_bytes // 4
+        self.size = size
+        self.bytes = 0
+        self._items = OrderedDict()   # key -> (value, size)
+        self._lock = threading.Lock()
+
+    def get(self, key, compute):
+        """Cached value for key, or compute() (outside the lock) and store it."""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key][0]
+
+        value = compute()
+        n = self.size(value)
+        if n > self.max_item:
+            return value
+
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = (value, n)
+                self.bytes += n
+            while self.bytes > self.max_bytes:
+                _, (_, old) = self._items.popitem(last=False)
+                self.bytes -= old
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._items
+
+    def __len__(self):
+        return len(self._items)
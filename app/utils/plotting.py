@@ -8,6 +8,45 @@ from matplotlib.collections import PatchCollection
 import cartopy.crs as ccrs
 import cartopy.io.img_tiles as cimgt
 
+def generate_heatmap(lats, lons, data, bounds, title, subtitle):
+    """
+    Precipitation heatmap of a (lat, lon) grid on a plain PlateCarree map.
+    Draws only local data (no map tiles or other downloads), so its cost
+    does not grow with the size of the bounds beyond the grid itself.
+    """
+    # 1. Hide dry cells so only rain is coloured
+    masked = np.ma.masked_less_equal(np.asarray(data), 0.1)
+
+    # 2. Setup Figure with Map Projection
+    fig = plt.figure(figsize=(12, 10))
+    ax = plt.axes(projection=ccrs.PlateCarree())
+    ax.set_extent([bounds['left'], bounds['right'], bounds['bottom'], bounds['top']], crs=ccrs.PlateCarree())
+    ax.set_facecolor('#222222')
+
+    # 3. Heatmap
+    mesh = ax.pcolormesh(
+        lons, lats, masked,
+        cmap='turbo', vmin=0.1, vmax=20, shading='nearest',
+        transform=ccrs.PlateCarree(),
+    )
+
+    # 4. Decorators
+    cbar = plt.colorbar(mesh, ax=ax, orientation='horizontal', pad=0.05, fraction=0.04, extend='max')
+    cbar.set_label('Precipitation (mm/hr)', size=10)
+
+    gl = ax.gridlines(draw_labels=True, linestyle=':', alpha=0.5, color='white')
+    gl.top_labels = False
+    gl.right_labels = False
+
+    ax.set_title(f"{title}\n{subtitle}", fontsize=14, fontweight='bold', pad=12)
+
+    # 5. Save
+    buf = io.BytesIO()
+    plt.savefig(buf, format='png', bbox_inches='tight', dpi=100)
+    buf.seek(0)
+    plt.close(fig)
+    return buf.getvalue()
+
 def generate_debug_heatmap(lats, lons, data, bounds, polygons=None):
     """
     Debug Plot:
@@ -0,0 +1,116 @@
+"""
+GPM request benchmark: wall time, peak memory, retained memory and
+allocation counts per request.
+
+Usage: python -m scripts.bench_gpm [FILENAME] [-n RUNS]
+FILENAME defaults to the first GPM file in app/data/.
+"""
+import argparse
+import gc
+import statistics
+import time
+import tracemalloc
+
+from app.services import gpm_overview, gpm_render, gpm_service
+
+SMALL = {'top': -5, 'bottom': -10, 'left': 105, 'right': 115}
+REGION = {'top': 30, 'bottom': -30, 'left': 60, 'right': 160}
+WORLD = {'top': 90, 'bottom': -90, 'left': -180, 'right': 180}
+
+
+def _render(draw, bounds, width=None, height=None):
+    """Full request path minus HTTP and the response cache: load/process, then render."""
+    def run(filename):
+        return gpm_render.render_arrays(draw, bounds, *gpm_render.load_and_process_gpm(filename, bounds, width, height))
+    return run
+
+
+SCENARIOS = [
+    ("load small", lambda f: gpm_render.load_and_process_gpm(f, SMALL)),
+    ("load world 1000x800", lambda f: gpm_render.load_and_process_gpm(f, WORLD, *gpm_render.PLOT_SIZE)),
+    ("vector small", _render("vector", SMALL)),
+    ("vector region", _render("vector", REGION)),
+    ("vector world 1000x800", _render("vector", WORLD, *gpm_render.PLOT_SIZE)),
+    ("sparse small", lambda f: gpm_service.get_sparse_cloud_data(f, SMALL)),
+    ("sparse region", lambda f: gpm_service.get_sparse_cloud_data(f, REGION)),
+]
+
+
+# (bounds, width, height) for the level-of-detail sanity check
+LOD_CASES = [
+    (WORLD, 800, 400),
+    (WORLD, *gpm_render.PLOT_SIZE),
+    (WORLD, 300, 200),
+    (REGION, 400, 300),
+    ({'top': 20, 'bottom': -20, 'left': 100, 'right': 140}, 50, 50),
+]
+
+
+def check_lod(filename):
+    """read_lod must not undershoot: at least ~half the target per axis (if the window has the cells)."""
+    failures = 0
+    for bounds, width, height in LOD_CASES:
+        lats, lons = gpm_overview.gpm_reader.read_axes(filename, bounds)
+        _, _, data = gpm_overview.read_lod(filename, bounds, width, height)
+        ny, nx = data.shape
+        ok = ny >= min(len(lats), height) // 2 and nx >= min(len(lons), width) // 2
+        failures += not ok
+        print(f"lod {width}x{height} of {len(lons)}x{len(lats)} -> {nx}x{ny} {'ok' if ok else 'TOO COARSE'}")
+    return failures
+
+
+def _measure(fn, filename, runs):
+    # Warm-up: fills coordinate/overview caches and scratch buffers
+    fn(filename)
+
+    times = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(filename)
+        times.append((time.perf_counter() - t0) * 1000)
+
+    # Memory pass (tracemalloc slows things down, so it is timed separately).
+    # numpy reports array buffers to tracemalloc, so both numbers include them.
+    # Retained = memory still held after the request (caches, scratch growth).
+    # Blocks = net number of allocations still alive after the request
+    # (count_diff): a leak or a growing cache shows up here even when its
+    # bytes are small. Cyclic garbage (matplotlib figures) is collected
+    # before each snapshot so it is not counted as retained.
+    tracemalloc.start()
+    gc.collect()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    fn(filename)
+    _, peak = tracemalloc.get_traced_memory()
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    diff = after.compare_to(before, 'filename')
+    retained = sum(d.size_diff for d in diff)
+    blocks = sum(d.count_diff for d in diff)
+    return statistics.median(times), peak, retained, blocks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("filename", nargs="?")
+    parser.add_argument("-n", "--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    filename = args.filename or next(iter(gpm_service.list_available_files()), None)
+    if not filename:
+        raise SystemExit("No GPM files in app/data/")
+
+    if check_lod(filename):
+        raise SystemExit("Level-of-detail check failed")
+
+    print(f"{filename} ({args.runs} runs)")
+    print(f"{'scenario':<24}{'median ms':>12}{'peak MiB':>12}{'retained KiB':>14}{'blocks':>8}")
+    for name, fn in SCENARIOS:
+        ms, peak, retained, blocks = _measure(fn, filename, args.runs)
+        print(f"{name:<24}{ms:>12.2f}{peak / 2**20:>12.2f}{retained / 2**10:>14.1f}{blocks:>8}")
+
+
+if __name__ == "__main__":
+    main()